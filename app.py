@@ -1,5 +1,9 @@
 import os
-from typing import List, Optional
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import aiofiles
 from fastapi import FastAPI, UploadFile, File, Form, Query
 from fastapi.responses import JSONResponse
 
@@ -11,31 +15,95 @@ app = FastAPI(title="PDF RAG Chatbot", version="1.0.0")
 # Single global corpus (can be extended to multi-tenant by namespace)
 manager = CorpusManager()
 
+# Blocking corpus work runs off the event loop: mutations one at a time, queries on their own pool
+_write_pool = ThreadPoolExecutor(max_workers=1)
+_read_pool = ThreadPoolExecutor(max_workers=4)
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+async def _run_blocking(pool: ThreadPoolExecutor, fn, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+
+# Dynamic micro-batching for /ask: concurrent questions are encoded together
+ASK_MAX_BATCH = 32
+ASK_MAX_WAIT_S = 0.010
+_ask_queue: Optional[asyncio.Queue] = None
+_ask_task: Optional[asyncio.Task] = None
+
+
+def _answer_batch(batch: List[Tuple[str, int, str]]) -> List[Tuple[bool, Any]]:
+    vecs = manager.encode_queries([q for q, _, _ in batch])
+    outcomes: List[Tuple[bool, Any]] = []
+    for i, (question, top_k, style) in enumerate(batch):
+        try:
+            q_vec = vecs[i] if vecs is not None else None
+            outcomes.append((True, manager.ask(question, top_k=top_k, style=style, q_vec=q_vec)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
+
+
+async def _ask_batcher(queue: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        pending = [await queue.get()]
+        deadline = loop.time() + ASK_MAX_WAIT_S
+        while len(pending) < ASK_MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                pending.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            outcomes = await _run_blocking(_read_pool, _answer_batch, [params for params, _ in pending])
+        except Exception as e:
+            outcomes = [(False, e)] * len(pending)
+        for (_, fut), (ok, value) in zip(pending, outcomes):
+            if fut.done():
+                continue
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+
+@app.on_event("startup")
+async def _start_ask_batcher() -> None:
+    global _ask_queue, _ask_task
+    _ask_queue = asyncio.Queue()
+    _ask_task = asyncio.create_task(_ask_batcher(_ask_queue))
+
 
 @app.post("/upload_pdf")
 async def upload_pdf(files: List[UploadFile] = File(...)):
     saved_paths: List[str] = []
     for uf in files:
-        # Save to disk under data/pdfs
-        contents = await uf.read()
+        # Stream to disk under data/pdfs without holding the whole file in memory
         dst = os.path.join(os.path.dirname(__file__), "data", "pdfs", uf.filename)
         os.makedirs(os.path.dirname(dst), exist_ok=True)
-        with open(dst, "wb") as f:
-            f.write(contents)
+        async with aiofiles.open(dst, "wb") as f:
+            while chunk := await uf.read(UPLOAD_CHUNK_BYTES):
+                await f.write(chunk)
         saved_paths.append(dst)
-    result = manager.add_pdfs(saved_paths)
+    result = await _run_blocking(_write_pool, manager.add_pdfs, saved_paths)
     return JSONResponse({"status": "ok", "added": result.get("added", 0), "files": [os.path.basename(p) for p in saved_paths], "items": result.get("items", [])})
 
 
 @app.post("/give_url")
 async def give_url(url: str = Form(...), limit: Optional[int] = Form(None)):
-    result = manager.add_from_url(url, limit=limit)
+    result = await _run_blocking(_write_pool, manager.add_from_url, url, limit=limit)
     return JSONResponse({"status": "ok", "added": result.get("added", 0), "items": result.get("items", [])})
 
 
 @app.post("/ask")
 async def ask(question: str = Form(...), top_k: int = Form(7), style: str = Form("concise"), best_only: bool = Form(True)):
-    result = manager.ask(question, top_k=top_k, style=style)
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    await _ask_queue.put(((question, top_k, style), fut))
+    result: Dict[str, Any] = await fut
     if best_only:
         return JSONResponse({"answer": result.get("answer", "")})
     return JSONResponse(result)
@@ -43,14 +111,14 @@ async def ask(question: str = Form(...), top_k: int = Form(7), style: str = Form
 
 @app.post("/delete_pdf")
 async def delete_pdf(filename: str = Form(...)):
-    result = manager.delete_pdf(filename)
+    result = await _run_blocking(_write_pool, manager.delete_pdf, filename)
     status = "ok" if result.get("deleted") else "not_found"
     return JSONResponse({"status": status, **result})
 
 
 @app.post("/reset")
 async def reset_all():
-    result = manager.reset_indexes_and_metadata()
+    result = await _run_blocking(_write_pool, manager.reset_indexes_and_metadata)
     return JSONResponse(result)
 
 
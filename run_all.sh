@@ -40,7 +40,7 @@ fi
 
 # Dependency sanity check (no installs here by design)
 missing=()
-for mod in requests bs4 pdfplumber sentence_transformers numpy sklearn transformers accelerate torch rich pydantic feedparser wikipedia; do
+for mod in requests selectolax pymupdf sentence_transformers numpy faiss transformers accelerate torch rich pydantic feedparser wikipedia; do
   if [[ "$PYTHON_BIN" == conda* ]]; then
     $PYTHON_BIN -c "import ${mod}" 2>/dev/null || missing+=("$mod")
   else
@@ -1,15 +1,17 @@
 import os
 import argparse
+import functools
+import multiprocessing
 from typing import List, Dict, Any
 from rich import print
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from src.downloader import download_from_url
 from src.parser import parse_pdf
 from src.chunker import build_chunks
 from src.indexer import ChunkIndex
 from src.chat import ChatSession
-from src.utils import compute_files_digest
+from src.utils import compute_files_digest, compute_files_digest_fast
 
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
@@ -17,29 +19,37 @@ PDF_DIR = os.path.join(DATA_DIR, "pdfs")
 INDEX_DIR = os.path.join(DATA_DIR, "index")
 
 
-def parse_one(pdf_item: Dict[str, str]) -> List[Dict[str, Any]]:
-    parsed = parse_pdf(pdf_item["pdf"], paper_id=pdf_item["title"])  # using title as id
+def parse_one(pdf_item: Dict[str, str], workers: int = 1) -> List[Dict[str, Any]]:
+    parsed = parse_pdf(pdf_item["pdf"], paper_id=pdf_item["title"], workers=workers)  # using title as id
     return build_chunks(parsed)
 
 
 def build_index_from_pdfs(pdfs: List[Dict[str, str]], device: str | None, cache_dir: str) -> ChunkIndex:
     os.makedirs(cache_dir, exist_ok=True)
-    digest = compute_files_digest([p["pdf"] for p in pdfs])
+    paths = [p["pdf"] for p in pdfs]
+    digest = compute_files_digest(paths) if os.environ.get("HLAI_STRICT_DIGEST") == "1" else compute_files_digest_fast(paths)
     cache_path = os.path.join(cache_dir, f"{digest}")
 
     # Try cache
     try:
-        index = ChunkIndex.load(cache_path)
+        index = ChunkIndex.load(cache_path, device=device)
         return index
     except Exception:
         pass
 
-    # Parallel parse
+    # Parallel parse: parsing is CPU-bound, so use processes unless the batch is too small to pay for startup
     all_chunks: List[Dict[str, Any]] = []
-    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4)) as ex:
-        futures = [ex.submit(parse_one, p) for p in pdfs]
-        for fut in as_completed(futures):
-            all_chunks.extend(fut.result())
+    if len(pdfs) <= 2:
+        # Too few PDFs to fill a per-PDF pool; split each one's pages across processes instead
+        page_workers = max(1, min(8, os.cpu_count() or 1) // max(1, len(pdfs)))
+        with ThreadPoolExecutor(max_workers=max(1, len(pdfs))) as ex:
+            for chunks in ex.map(functools.partial(parse_one, workers=page_workers), pdfs):
+                all_chunks.extend(chunks)
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 4, len(pdfs)), mp_context=ctx) as ex:
+            for chunks in ex.map(parse_one, pdfs, chunksize=1):
+                all_chunks.extend(chunks)
 
     index = ChunkIndex(device=device)
     index.build(all_chunks)
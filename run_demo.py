@@ -1,8 +1,11 @@
 import os
 import math
 import argparse
-from typing import List, Dict, Any
+import functools
+import multiprocessing
+from typing import List, Dict, Any, Tuple
 from rich import print
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from src.downloader import download_latest_pdfs
 from src.parser import parse_pdf
@@ -26,6 +29,12 @@ SAMPLE_QUERIES = [
 ]
 
 
+def parse_one(paper: Dict[str, str], workers: int = 1) -> Tuple[int, List[Dict[str, Any]]]:
+    parsed = parse_pdf(paper["pdf"], paper_id=paper["title"], workers=workers)  # using title as id
+    num_pages = len({item["page"] for item in parsed})
+    return num_pages, build_chunks(parsed)
+
+
 def main(limit: int = 3, force_rebuild: bool = False, style: str = "concise") -> None:
     os.makedirs(PDF_DIR, exist_ok=True)
     os.makedirs(INDEX_DIR, exist_ok=True)
@@ -41,10 +50,17 @@ def main(limit: int = 3, force_rebuild: bool = False, style: str = "concise") ->
     print("[bold]Parsing and chunking...[/bold]")
     all_chunks: List[Dict[str, Any]] = []
     total_pages = 0
-    for p in papers:
-        parsed = parse_pdf(p["pdf"], paper_id=p["title"])  # using title as id
-        total_pages += len({item["page"] for item in parsed})
-        per_paper_chunks = build_chunks(parsed)
+    if len(papers) <= 2:
+        # Too few PDFs to fill a per-PDF pool; split each one's pages across processes instead
+        page_workers = max(1, min(8, os.cpu_count() or 1) // max(1, len(papers)))
+        with ThreadPoolExecutor(max_workers=max(1, len(papers))) as ex:
+            parsed_papers = list(ex.map(functools.partial(parse_one, workers=page_workers), papers))
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 4, len(papers)), mp_context=ctx) as ex:
+            parsed_papers = list(ex.map(parse_one, papers, chunksize=1))
+    for num_pages, per_paper_chunks in parsed_papers:
+        total_pages += num_pages
         all_chunks.extend(per_paper_chunks)
     if not all_chunks:
         print("[red]No chunks produced from PDFs.[/red]")
@@ -0,0 +1,35 @@
+import numpy as np
+try:
+    from numba import njit  # type: ignore
+except Exception:  # pragma: no cover
+    njit = None  # fall back to the interpreted kernel
+
+
+def _window_bounds(lengths: np.ndarray, max_chars: int, overlap_sentences: int) -> np.ndarray:
+    # Rows are (start, end, truncated): sentences[start:end] form one chunk; truncated marks a single
+    # sentence longer than max_chars that must be cut
+    n = lengths.shape[0]
+    bounds = np.empty((n, 3), dtype=np.int64)
+    count = 0
+    start = 0
+    while start < n:
+        total = 0
+        i = start
+        while i < n and total + lengths[i] + 1 <= max_chars:
+            total += lengths[i] + 1
+            i += 1
+        truncated = 0
+        if i == start:
+            i = start + 1
+            truncated = 1
+        bounds[count, 0] = start
+        bounds[count, 1] = i
+        bounds[count, 2] = truncated
+        count += 1
+        if i >= n:
+            break
+        start = max(i - overlap_sentences, start + 1)
+    return bounds[:count]
+
+
+window_bounds = njit(cache=True)(_window_bounds) if njit is not None else _window_bounds
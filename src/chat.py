@@ -1,14 +1,19 @@
 from typing import List, Dict, Any
+import numpy as np
 from .indexer import ChunkIndex
 from .retriever import retrieve
 from .qa import SimpleGenerator
 
 
 class ChatSession:
-    def __init__(self, index: ChunkIndex, style: str = "concise") -> None:
+    def __init__(self, index: ChunkIndex, style: str = "concise", history_weight: float = 0.3, retrieval_turns: int = 2) -> None:
         self.index = index
         self.history: List[Dict[str, str]] = []
         self.generator = SimpleGenerator(style=style)
+        self.history_weight = history_weight
+        self.retrieval_turns = retrieval_turns
+        # Embedding of the recent history, recomputed only when history changes
+        self._hist_vec: np.ndarray | None = None
 
     def set_style(self, style: str) -> None:
         self.generator.set_style(style)
@@ -21,12 +26,21 @@ class ChatSession:
             lines.append(f"Assistant: {t['a']}")
         return "\n".join(lines)
 
+    def _update_history_vec(self) -> None:
+        hist = self._history_context(max_turns=self.retrieval_turns)
+        self._hist_vec = self.index.encode_text(hist) if hist else None
+
     def ask(self, query: str, top_k: int = 5) -> Dict[str, Any]:
-        # Retrieve with history-sensitive query
-        hist = self._history_context()
-        effective_query = f"{hist}\n\nCurrent question: {query}" if hist else query
-        results = retrieve(self.index, effective_query, top_k=top_k)
+        # Retrieve with a history-sensitive vector: blend the cached history embedding with the question's
+        q_vec = self.index.encode_query(query)
+        if self._hist_vec is not None:
+            vec = self.history_weight * self._hist_vec + (1.0 - self.history_weight) * q_vec
+            vec = vec / max(float(np.linalg.norm(vec)), 1e-12)
+        else:
+            vec = q_vec
+        results = retrieve(self.index, query, top_k=top_k, query_vec=vec)
         contexts = [r["content"] for r in results]
         answer = self.generator.answer(query, contexts)
         self.history.append({"q": query, "a": answer})
+        self._update_history_vec()
         return {"answer": answer, "chunks": results}
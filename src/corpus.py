@@ -1,18 +1,22 @@
 import os
 import shutil
 import math
-import json
-import time
+import atexit
+import pickle
+import hashlib
+import threading
+import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from .utils import ensure_dir, compute_id
+from .utils import ensure_dir, compute_id, read_json, write_json, LRUCache
 from .parser import parse_pdf
 from .chunker import build_chunks
 from .indexer import ChunkIndex
 from .downloader import download_from_url
 from .qa import SimpleGenerator
 from .rerank import Reranker
+from .query_cache import SemanticCache
 
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
@@ -20,6 +24,7 @@ PDF_DIR = os.path.join(DATA_DIR, "pdfs")
 INDEX_DIR = os.path.join(DATA_DIR, "index")
 IDS_DIR = os.path.join(INDEX_DIR, "by_id")
 META_PATH = os.path.join(INDEX_DIR, "metadata.json")
+RERANK_CACHE_PATH = os.path.join(INDEX_DIR, "rerank_cache.pkl")
 
 
 class CorpusManager:
@@ -28,19 +33,33 @@ class CorpusManager:
         ensure_dir(IDS_DIR)
         self.device = device
         self._indices: Dict[str, ChunkIndex] = {}
+        # Saved indices not yet loaded (uid -> pdf_path); loaded in the background or on first query
+        self._pending_uids: Dict[str, str] = {}
+        self._load_lock = threading.Lock()
         self._file_map: Dict[str, Dict[str, str]] = {}
         self._generator = SimpleGenerator()
         self._reranker = Reranker()
+        # Unbuilt index used only to embed questions; it shares the process-wide encoder with every per-file index
+        self._query_encoder = ChunkIndex(device=self.device)
+        self._query_encoder._get_model()
+        self._sem_cache = SemanticCache(
+            threshold=float(os.environ.get("HLAI_SEM_CACHE_THRESHOLD", "0.92")),
+            ttl=float(os.environ.get("HLAI_SEM_CACHE_TTL", "600")),
+        )
+        # Bumped on every add/delete/reset; part of every rerank cache key
+        self._corpus_version = 0
+        self._rerank_cache = LRUCache(maxsize=512)
         self._load_metadata()
         self._load_existing_indices()
+        self._load_rerank_cache()
+        atexit.register(self._save_rerank_cache)
 
     def _load_metadata(self) -> None:
         if os.path.exists(META_PATH):
             try:
-                with open(META_PATH, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        self._file_map = data
+                data = read_json(META_PATH)
+                if isinstance(data, dict):
+                    self._file_map = data
             except Exception:
                 self._file_map = {}
         else:
@@ -49,14 +68,46 @@ class CorpusManager:
     def _save_metadata(self) -> None:
         ensure_dir(os.path.dirname(META_PATH))
         tmp = META_PATH + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(self._file_map, f, ensure_ascii=False, indent=2)
+        write_json(tmp, self._file_map)
         os.replace(tmp, META_PATH)
 
+    def _corpus_key(self) -> Tuple[str, ...]:
+        return tuple(sorted(m.get("uid", "") for m in self._file_map.values()))
+
+    def _load_rerank_cache(self) -> None:
+        if not os.path.exists(RERANK_CACHE_PATH):
+            return
+        try:
+            with open(RERANK_CACHE_PATH, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            return
+        # Only trust persisted entries if they were produced for exactly this set of files
+        if not isinstance(data, dict) or data.get("corpus_key") != self._corpus_key():
+            return
+        self._corpus_version = int(data.get("corpus_version", 0))
+        for key, value in data.get("entries", []):
+            self._rerank_cache.put(key, value)
+
+    def _save_rerank_cache(self) -> None:
+        try:
+            ensure_dir(os.path.dirname(RERANK_CACHE_PATH))
+            tmp = RERANK_CACHE_PATH + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump({"corpus_key": self._corpus_key(), "corpus_version": self._corpus_version, "entries": self._rerank_cache.items()}, f)
+            os.replace(tmp, RERANK_CACHE_PATH)
+        except Exception:
+            pass
+
+    def _bump_corpus_version(self) -> None:
+        self._corpus_version += 1
+        self._sem_cache.clear()
+
     def _generate_uid_for_file(self, pdf_path: str) -> str:
         st = os.stat(pdf_path)
         base = os.path.basename(pdf_path)
-        uid = compute_id(base, str(st.st_size), str(int(st.st_mtime)), str(time.time()))
+        # Stable across runs so re-adding an unchanged file reuses its saved index
+        uid = compute_id(base, str(st.st_size), str(st.st_mtime_ns))
         return uid
 
     def _index_dir_for_uid(self, uid: str) -> str:
@@ -75,10 +126,11 @@ class CorpusManager:
 
     def _ensure_index_for_uid(self, uid: str, pdf_path: str) -> ChunkIndex:
         if uid in self._indices:
+            self._pending_uids.pop(uid, None)
             return self._indices[uid]
         idx_dir = self._index_dir_for_uid(uid)
         try:
-            index = ChunkIndex.load(idx_dir)
+            index = ChunkIndex.load(idx_dir, device=self.device)
         except Exception:
             index = self._build_index_for_pdf(pdf_path, uid)
         self._indices[uid] = index
@@ -91,28 +143,61 @@ class CorpusManager:
             if not uid or not pdf_path or not os.path.exists(pdf_path):
                 self._file_map.pop(filename, None)
                 continue
-            try:
-                self._ensure_index_for_uid(uid, pdf_path)
-            except Exception:
-                # Keep metadata; index will be rebuilt lazily on demand
-                pass
+            self._pending_uids[uid] = pdf_path
         self._save_metadata()
+        if self._pending_uids:
+            threading.Thread(target=self._load_pending, daemon=True).start()
+
+    def _load_pending(self) -> None:
+        for uid, pdf_path in list(self._pending_uids.items()):
+            # Locked per uid so delete/reset wait for at most one load, and never see it resurrect a removed file
+            with self._load_lock:
+                if uid not in self._pending_uids:
+                    continue
+                try:
+                    self._ensure_index_for_uid(uid, pdf_path)
+                except Exception:
+                    # Keep metadata; the file stays listed even if its index cannot be loaded
+                    pass
+                self._pending_uids.pop(uid, None)
+
+    def _has_documents(self) -> bool:
+        return bool(self._indices or self._pending_uids)
+
+    def _encode_query(self, question: str) -> np.ndarray:
+        return self._query_encoder.encode_query(question)
 
-    def _aggregate_query(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def encode_queries(self, questions: List[str]) -> Optional[np.ndarray]:
+        if not self._has_documents():
+            return None
+        return self._query_encoder.encode_batch(questions)
+
+    def _aggregate_query(self, query: str, top_k: int, q_vec: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        cache_key = (hashlib.blake2b(query.encode("utf-8")).digest(), top_k, self._corpus_version)
+        cached = self._rerank_cache.get(cache_key)
+        if cached is not None:
+            return [dict(c) for c in cached]
+        if self._pending_uids:
+            # Just-in-time load of anything the background prefetch has not reached yet
+            self._load_pending()
         results: List[Tuple[Dict[str, Any], float]] = []
         num_files = max(1, len(self._indices))
         per_file_k = max(3, math.ceil(top_k * 3 / num_files))
-        for uid, idx in self._indices.items():
+        # Encode once and reuse the vector for every per-file search
+        if q_vec is None:
+            q_vec = self._encode_query(query)
+        for uid, idx in list(self._indices.items()):
             try:
-                neighbors = idx.query(query, top_k=per_file_k)
+                neighbors = idx.query_with_vec(q_vec, top_k=per_file_k, text=query)
             except Exception:
                 continue
             for idx_i, score in neighbors:
-                meta = dict(idx.meta[idx_i])
+                meta = idx.row(idx_i)
                 meta["score"] = float(score)
                 results.append((meta, float(score)))
         candidates = [m for m, _ in results]
         reranked = self._reranker.rerank(query, candidates, top_k)
+        self._rerank_cache.put(cache_key, [dict(c) for c in reranked])
         return reranked
 
     def add_pdfs(self, file_paths: List[str]) -> Dict[str, Any]:
@@ -131,6 +216,7 @@ class CorpusManager:
             self._file_map[filename] = {"uid": uid, "pdf_path": dst}
             self._ensure_index_for_uid(uid, dst)
             added_items.append({"filename": filename, "uid": uid})
+        self._bump_corpus_version()
         self._save_metadata()
         return {"added": len(added_items), "items": added_items}
 
@@ -143,17 +229,28 @@ class CorpusManager:
             self._file_map[filename] = {"uid": uid, "pdf_path": it["pdf"]}
             self._ensure_index_for_uid(uid, it["pdf"])
             added_items.append({"filename": filename, "uid": uid})
+        self._bump_corpus_version()
         self._save_metadata()
         return {"added": len(added_items), "items": added_items}
 
-    def ask(self, question: str, top_k: int = 7, style: str = "concise") -> Dict[str, Any]:
-        if not self._indices:
+    def ask(self, question: str, top_k: int = 7, style: str = "concise", q_vec: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        if not self._has_documents():
             return {"answer": "No PDFs indexed yet.", "chunks": []}
-        fused = self._aggregate_query(question, top_k=top_k)
+        if q_vec is None:
+            q_vec = self._encode_query(question)
+        # The version pins entries to the corpus they were built from; a concurrent add/delete/reset changes it
+        version = self._corpus_version
+        scope = (top_k, style, version)
+        cached = self._sem_cache.lookup(q_vec, scope)
+        if cached is not None:
+            return {"answer": cached["answer"], "chunks": [dict(c) for c in cached["chunks"]]}
+        fused = self._aggregate_query(question, top_k=top_k, q_vec=q_vec)
         contexts = [r.get("content", "") for r in fused]
         ids = [r.get("id") or f"C{i+1}" for i, r in enumerate(fused)]
         self._generator.set_style(style)
         answer = self._generator.answer(question, contexts, ids=ids)
+        if version == self._corpus_version:
+            self._sem_cache.add(q_vec, scope, {"answer": answer, "chunks": [dict(c) for c in fused]})
         return {"answer": answer, "chunks": fused}
 
     def delete_pdf(self, filename: str) -> Dict[str, Any]:
@@ -162,61 +259,40 @@ class CorpusManager:
             return {"deleted": False, "reason": "File not found"}
         uid = meta.get("uid")
         pdf_path = meta.get("pdf_path")
-        if pdf_path and os.path.exists(pdf_path):
-            try:
-                os.remove(pdf_path)
-            except Exception:
-                return {"deleted": False, "reason": "Failed to remove file"}
-        if uid in self._indices:
-            del self._indices[uid]
-        idx_dir = self._index_dir_for_uid(uid)
-        if os.path.isdir(idx_dir):
-            for root, dirs, files in os.walk(idx_dir, topdown=False):
-                for fn in files:
-                    try:
-                        os.remove(os.path.join(root, fn))
-                    except Exception:
-                        pass
-                for dn in dirs:
-                    try:
-                        os.rmdir(os.path.join(root, dn))
-                    except Exception:
-                        pass
-            try:
-                os.rmdir(idx_dir)
-            except Exception:
-                pass
-        self._file_map.pop(filename, None)
-        self._save_metadata()
+        with self._load_lock:
+            if pdf_path and os.path.exists(pdf_path):
+                try:
+                    os.remove(pdf_path)
+                except Exception:
+                    return {"deleted": False, "reason": "Failed to remove file"}
+            if uid in self._indices:
+                del self._indices[uid]
+            self._pending_uids.pop(uid, None)
+            shutil.rmtree(self._index_dir_for_uid(uid), ignore_errors=True)
+            self._file_map.pop(filename, None)
+            self._bump_corpus_version()
+            self._save_metadata()
         return {"deleted": True}
 
     def list_pdfs(self) -> List[str]:
         return sorted(list(self._file_map.keys()))
 
     def reset_indexes_and_metadata(self) -> Dict[str, Any]:
-        # Clear in-memory
-        self._indices.clear()
-        self._file_map.clear()
-        # Remove by_id folder contents
-        if os.path.isdir(IDS_DIR):
-            for root, dirs, files in os.walk(IDS_DIR, topdown=False):
-                for fn in files:
-                    try:
-                        os.remove(os.path.join(root, fn))
-                    except Exception:
-                        pass
-                for dn in dirs:
-                    try:
-                        os.rmdir(os.path.join(root, dn))
-                    except Exception:
-                        pass
-        # Remove metadata file
-        if os.path.exists(META_PATH):
-            try:
-                os.remove(META_PATH)
-            except Exception:
-                pass
-        # Recreate base dirs
-        ensure_dir(IDS_DIR)
-        self._save_metadata()
+        with self._load_lock:
+            # Clear in-memory
+            self._indices.clear()
+            self._pending_uids.clear()
+            self._file_map.clear()
+            self._bump_corpus_version()
+            # Remove by_id folder contents
+            shutil.rmtree(IDS_DIR, ignore_errors=True)
+            # Remove metadata file
+            if os.path.exists(META_PATH):
+                try:
+                    os.remove(META_PATH)
+                except Exception:
+                    pass
+            # Recreate base dirs
+            ensure_dir(IDS_DIR)
+            self._save_metadata()
         return {"status": "ok"}
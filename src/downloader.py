@@ -1,23 +1,31 @@
 import os
 import re
-from typing import List, Dict, Optional
+import asyncio
+from typing import Any, List, Dict, Optional
+import aiofiles
+import httpx
 import requests
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import feedparser
 from .utils import ensure_dir
+try:
+    import hyperscan  # type: ignore
+except Exception:  # pragma: no cover
+    hyperscan = None  # fall back to the re module
 
 HF_DATE_URL = "https://huggingface.co/papers/date/2025-09-30"
 ARXIV_RECENT_API = "http://export.arxiv.org/api/query?search_query=all&start=0&max_results={limit}&sortBy=submittedDate&sortOrder=descending"
+MAX_CONCURRENT_DOWNLOADS = 8
+# Large read size so each write syscall moves a big block instead of 8 KiB
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+
+# /papers/<id> detail links, excluding date/trending listings and anchors/query strings, in one match
+_PAPER_HREF_RE = re.compile(r"(?!.*(?:/date/|/trending))/papers/[^#?]*\Z", re.DOTALL)
 
 
 def _is_valid_paper_href(href: str) -> bool:
-    if not href or not href.startswith("/papers/"):
-        return False
-    if "/date/" in href or "/trending" in href:
-        return False
-    if "#" in href or "?" in href:
-        return False
-    return True
+    return bool(href) and _PAPER_HREF_RE.match(href) is not None
 
 
 def fetch_paper_list(limit: int = 3) -> List[Dict[str, str]]:
@@ -27,29 +35,32 @@ def fetch_paper_list(limit: int = 3) -> List[Dict[str, str]]:
 def fetch_paper_list_from_url(url: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
     resp = requests.get(url, timeout=60)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-    items: List[Dict[str, str]] = []
-
-    # Collect paper detail pages
-    for a in soup.find_all("a"):
-        href = a.get("href") or ""
-        if _is_valid_paper_href(href):
-            title = a.get_text(" ", strip=True) or href.rsplit("/", 1)[-1]
-            full = f"https://huggingface.co{href}"
-            items.append({"title": title, "url": full})
-
-    # Also collect any direct PDF links on the page itself
-    for a in soup.find_all("a"):
-        href = a.get("href") or ""
-        if href.endswith(".pdf"):
-            title = a.get_text(" ", strip=True) or href.rsplit("/", 1)[-1]
+    return _parse_paper_list(resp.text, url, limit)
+
+
+def _parse_paper_list(html: str, url: str, limit: Optional[int]) -> List[Dict[str, str]]:
+    tree = LexborHTMLParser(html)
+    paper_items: List[Dict[str, str]] = []
+    pdf_items: List[Dict[str, str]] = []
+
+    # Single pass over anchors: paper detail pages and direct PDF links on the page itself
+    for a in tree.css("a[href]"):
+        href = a.attributes.get("href") or ""
+        is_paper = _is_valid_paper_href(href)
+        is_pdf = href.endswith(".pdf")
+        if not is_paper and not is_pdf:
+            continue
+        title = " ".join(a.text(separator=" ").split()) or href.rsplit("/", 1)[-1]
+        if is_paper:
+            paper_items.append({"title": title, "url": f"https://huggingface.co{href}"})
+        if is_pdf:
             full = href if href.startswith("http") else f"https://huggingface.co{href}"
-            items.append({"title": title, "pdf": full, "page": url})
+            pdf_items.append({"title": title, "pdf": full, "page": url})
 
-    # Deduplicate
+    # Deduplicate (paper pages first, as before)
     dedup: List[Dict[str, str]] = []
     seen = set()
-    for it in items:
+    for it in paper_items + pdf_items:
         key = it.get("pdf") or it.get("url")
         if not key or key in seen:
             continue
@@ -62,25 +73,69 @@ def fetch_paper_list_from_url(url: str, limit: Optional[int] = None) -> List[Dic
 
 
 _ARXIV_ID_RE = re.compile(r"arxiv\.org/(?:abs|pdf)/(\d{4}\.\d{4,5})(?:v\d+)?", re.IGNORECASE)
+_ARXIV_ID_BYTES_RE = re.compile(_ARXIV_ID_RE.pattern.encode("ascii"), re.IGNORECASE)
+
+
+def _compile_arxiv_db() -> Any:
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[rb"arxiv\.org/(?:abs|pdf)/\d{4}\.\d{4,5}"],
+            ids=[1],
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST],
+        )
+        return db
+    except Exception:
+        return None
+
+
+_ARXIV_DB = _compile_arxiv_db()
 
 
 def _find_arxiv_id(html: str) -> str | None:
-    m = _ARXIV_ID_RE.search(html or "")
-    if m:
-        return m.group(1)
-    return None
+    if not html:
+        return None
+    if _ARXIV_DB is None:
+        m = _ARXIV_ID_RE.search(html)
+        return m.group(1) if m else None
+    # Hyperscan only reports offsets: stop at the first hit, then read the id with an anchored match there
+    data = html.encode("utf-8")
+    starts: List[int] = []
+
+    def on_match(_id: int, start: int, _end: int, _flags: int, _ctx: Any) -> bool:
+        starts.append(start)
+        return True
+
+    try:
+        _ARXIV_DB.scan(data, match_event_handler=on_match)
+    except hyperscan.ScanTerminated:
+        pass
+    if not starts:
+        return None
+    m = _ARXIV_ID_BYTES_RE.match(data, starts[0])
+    return m.group(1).decode("ascii") if m else None
 
 
 def resolve_pdf_url(paper_url: str) -> str:
     resp = requests.get(paper_url, timeout=60)
     resp.raise_for_status()
-    html = resp.text
-    soup = BeautifulSoup(html, "html.parser")
+    return _pdf_url_from_paper_html(resp.text, paper_url)
+
+
+async def _resolve_pdf_url_async(client: httpx.AsyncClient, paper_url: str) -> str:
+    resp = await client.get(paper_url, timeout=60)
+    resp.raise_for_status()
+    return _pdf_url_from_paper_html(resp.text, paper_url)
+
+
+def _pdf_url_from_paper_html(html: str, paper_url: str) -> str:
     arxiv_id = _find_arxiv_id(html)
     if arxiv_id:
         return f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-    for a in soup.find_all("a"):
-        href = a.get("href") or ""
+    for a in LexborHTMLParser(html).css("a[href]"):
+        href = a.attributes.get("href") or ""
         if href.endswith(".pdf"):
             if href.startswith("http"):
                 return href
@@ -94,30 +149,64 @@ def download_pdf(pdf_url: str, out_dir: str, filename: str) -> str:
     with requests.get(pdf_url, stream=True, timeout=120) as r:
         r.raise_for_status()
         with open(path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
+            for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
                 if chunk:
                     f.write(chunk)
     return path
 
 
-def _download_from_hf(out_dir: str, limit: Optional[int]) -> List[Dict[str, str]]:
-    papers = fetch_paper_list(limit=limit or None)
-    results: List[Dict[str, str]] = []
-    for p in papers:
+def _async_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    return httpx.AsyncClient(http2=True, follow_redirects=True, timeout=120, limits=limits)
+
+
+async def _download_pdf_async(client: httpx.AsyncClient, pdf_url: str, out_dir: str, filename: str) -> str:
+    ensure_dir(out_dir)
+    path = os.path.join(out_dir, filename)
+    async with client.stream("GET", pdf_url) as r:
+        r.raise_for_status()
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in r.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                if chunk:
+                    await f.write(chunk)
+    return path
+
+
+async def _download_paper_async(client: httpx.AsyncClient, sem: asyncio.Semaphore, p: Dict[str, str], out_dir: str, source: str, default_page: Optional[str]) -> Optional[Dict[str, Any]]:
+    async with sem:
         try:
             if "pdf" in p:
                 pdf_url = p["pdf"]
                 title = p.get("title") or os.path.basename(pdf_url)
             else:
-                pdf_url = resolve_pdf_url(p["url"]) 
+                pdf_url = await _resolve_pdf_url_async(client, p["url"])
                 title = p["title"]
             safe_name = re.sub(r"[^a-zA-Z0-9_-]+", "_", title)[:80]
             filename = f"{safe_name}.pdf"
-            path = download_pdf(pdf_url, out_dir, filename)
-            results.append({"title": title, "page": p.get("url") or p.get("page"), "pdf": path})
+            path = await _download_pdf_async(client, pdf_url, out_dir, filename)
+            return {"title": title, "page": p.get("url") or p.get("page", default_page), "pdf": path}
         except Exception as e:
-            print(f"[warn] Failed to download {p.get('title','')} from HF: {e}")
-    return results
+            print(f"[warn] Failed to download {p.get('title','')} from {source}: {e}")
+            return None
+
+
+async def _download_papers_async(client: httpx.AsyncClient, papers: List[Dict[str, str]], out_dir: str, source: str, default_page: Optional[str] = None) -> List[Dict[str, str]]:
+    # Resolve and download concurrently; wall time tracks the slowest paper rather than the sum
+    sem = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    results = await asyncio.gather(*[_download_paper_async(client, sem, p, out_dir, source, default_page) for p in papers])
+    return [r for r in results if r is not None]
+
+
+async def _download_from_hf_async(out_dir: str, limit: Optional[int]) -> List[Dict[str, str]]:
+    async with _async_client() as client:
+        resp = await client.get(HF_DATE_URL, timeout=60)
+        resp.raise_for_status()
+        papers = _parse_paper_list(resp.text, HF_DATE_URL, limit or None)
+        return await _download_papers_async(client, papers, out_dir, "HF")
+
+
+def _download_from_hf(out_dir: str, limit: Optional[int]) -> List[Dict[str, str]]:
+    return asyncio.run(_download_from_hf_async(out_dir, limit))
 
 
 def _download_from_arxiv(out_dir: str, limit: int) -> List[Dict[str, str]]:
@@ -155,21 +244,13 @@ def download_latest_pdfs(out_dir: str, limit: int = 3) -> List[Dict[str, str]]:
     return results
 
 
+async def download_from_url_async(out_dir: str, url: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    async with _async_client() as client:
+        resp = await client.get(url, timeout=60)
+        resp.raise_for_status()
+        papers = _parse_paper_list(resp.text, url, limit)
+        return await _download_papers_async(client, papers, out_dir, url, default_page=url)
+
+
 def download_from_url(out_dir: str, url: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
-    papers = fetch_paper_list_from_url(url, limit=limit)
-    results: List[Dict[str, str]] = []
-    for p in papers:
-        try:
-            if "pdf" in p:
-                pdf_url = p["pdf"]
-                title = p.get("title") or os.path.basename(pdf_url)
-            else:
-                pdf_url = resolve_pdf_url(p["url"]) 
-                title = p["title"]
-            safe_name = re.sub(r"[^a-zA-Z0-9_-]+", "_", title)[:80]
-            filename = f"{safe_name}.pdf"
-            path = download_pdf(pdf_url, out_dir, filename)
-            results.append({"title": title, "page": p.get("url") or p.get("page", url), "pdf": path})
-        except Exception as e:
-            print(f"[warn] Failed to download {p.get('title','')} from {url}: {e}")
-    return results
+    return asyncio.run(download_from_url_async(out_dir, url, limit=limit))
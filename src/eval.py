@@ -1,7 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, FrozenSet, Tuple
 import time
 import math
+import torch
 from transformers import pipeline
+from .utils import LRUCache
 
 
 _nli = None
@@ -10,19 +12,40 @@ def _get_nli():
     global _nli
     if _nli is None:
         try:
-            _nli = pipeline("text-classification", model="roberta-large-mnli")
+            if torch.cuda.is_available():
+                _nli = pipeline("text-classification", model="roberta-large-mnli", device=0, torch_dtype=torch.float16)
+            else:
+                _nli = pipeline("text-classification", model="roberta-large-mnli")
         except Exception:
             _nli = None
     return _nli
 
 
+# Keyed by chunk id: row dicts carry fresh content strings, and hashing those would cost as much as lowering them
+_folded_cache = LRUCache(maxsize=4096)
+
+
+def _folded(item: Dict[str, Any]) -> Tuple[str, FrozenSet[str]]:
+    # Eval loops see the same chunks for many queries; lowercase and tokenize each one once
+    cid = item.get("id")
+    folded = _folded_cache.get(cid) if cid else None
+    if folded is None:
+        lower = (item.get("content") or "").lower()
+        folded = (lower, frozenset(lower.split()))
+        if cid:
+            _folded_cache.put(cid, folded)
+    return folded
+
+
 def chunk_relevancy_precision_at_k(retrieved: List[Dict[str, Any]], query: str, k: int = 5) -> float:
     lower_q = query.lower()
     keywords = [w for w in lower_q.split() if len(w) >= 5]
+    keyword_set = frozenset(keywords)
     hits = 0
     for item in retrieved[:k]:
-        text = (item.get("content") or "").lower()
-        if any(kw in text for kw in keywords):
+        text, tokens = _folded(item)
+        # Whole-token hits are set lookups; the substring scan only runs when none match
+        if not tokens.isdisjoint(keyword_set) or any(kw in text for kw in keywords):
             hits += 1
             continue
         refs = item.get("refs") or {}
@@ -53,8 +76,10 @@ def latency_ms(start_time: float) -> float:
     return (time.perf_counter() - start_time) * 1000.0
 
 
-def hallucination_rate_proxy(answer: str, contexts: List[str]) -> float:
-    context_all = " \n ".join(contexts).lower()
+def hallucination_rate_proxy(answer: str, contexts: List[str], context_lowers: List[str] | None = None) -> float:
+    if context_lowers is None:
+        context_lowers = [c.lower() for c in contexts]
+    context_all = " \n ".join(context_lowers)
     a = answer.lower()
     nums = set([n for n in a.split() if any(ch.isdigit() for ch in n)])
     if not nums:
@@ -67,23 +92,21 @@ def nli_support_score(answer: str, contexts: List[str]) -> float | None:
     clf = _get_nli()
     if clf is None:
         return None
-    # Check if answer is entailed by any context chunk
+    # Check if answer is entailed by any context chunk; all pairs go through the model as one batch
+    hypothesis = answer.strip()
+    pairs = [f"{ctx.strip()} </s> {hypothesis}" for ctx in contexts[:5] if ctx.strip()] if hypothesis else []
+    if not pairs:
+        return 0.0
+    outs = clf(pairs, batch_size=len(pairs), truncation=True)
     scores = []
-    for ctx in contexts[:5]:
-        premise = ctx.strip()
-        hypothesis = answer.strip()
-        if not premise or not hypothesis:
-            continue
-        out = clf(f"{premise} </s> {hypothesis}")
+    for out in outs:
         # Expect labels entailment/neutral/contradiction
-        label = out[0]['label'].lower()
-        score = out[0]['score']
+        label = out['label'].lower()
+        score = out['score']
         if 'entail' in label:
             scores.append(score)
         elif 'contradict' in label:
             scores.append(-score)
         else:
             scores.append(0.0)
-    if not scores:
-        return 0.0
     return sum(scores) / len(scores)
@@ -1,115 +1,492 @@
 import os
+import json
 import pickle
+import string
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Sequence
 from typing import List, Dict, Any, Tuple
 import numpy as np
+import torch
+import faiss
+import pyarrow as pa
 from sentence_transformers import SentenceTransformer
-from sklearn.neighbors import NearestNeighbors
 try:
-    from rank_bm25 import BM25Okapi  # type: ignore
+    import simsimd  # type: ignore
 except Exception:  # pragma: no cover
-    BM25Okapi = None  # fallback to dense-only if not available
-from .utils import ensure_dir, compute_id
+    simsimd = None  # FAISS handles all dense scoring
+try:
+    import scipy.sparse as sp  # type: ignore
+except Exception:  # pragma: no cover
+    sp = None  # fallback to dense-only if not available
+from .utils import ensure_dir, compute_id, read_json, write_json
+from .query_cache import QueryEmbeddingCache, get_query_cache
+
+
+@functools.lru_cache(maxsize=4)
+def _get_encoder(model_name: str, device: str | None = None, use_onnx: bool = False) -> Any:
+    # One encoder per (model, device) shared by every ChunkIndex in the process
+    if use_onnx:
+        from .onnx_encoder import OnnxEncoder, default_model_dir
+        return OnnxEncoder(os.environ.get("HLAI_ONNX_DIR") or default_model_dir(model_name))
+    model = SentenceTransformer(model_name, device=device)
+    if model.device.type == "cuda":
+        # fp16 roughly doubles encoder throughput on GPU; outputs are cast back to fp32 below
+        model.half()
+    return model
+
+
+CHUNK_TYPES = ("text", "caption", "table")
+# Above this many chunks exact search is replaced by an HNSW graph
+HNSW_MIN_CHUNKS = 50_000
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+# Up to this many chunks, brute-force SimSIMD cosine over the fp16 matrix replaces the FAISS search
+SIMSIMD_MAX_CHUNKS = 20_000
+# Each ranking is cut this deep before RRF, so a hit strong in only one list still reaches the fused top-k
+RRF_DEPTH = 50
+
+# Okapi BM25 parameters (same defaults as rank_bm25)
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+# Lowercase ASCII and blank out punctuation in one pass, so "Figure," and "figure" are the same term
+_TR = str.maketrans(string.ascii_uppercase + string.punctuation, string.ascii_lowercase + " " * len(string.punctuation))
+# Bumped whenever _bm25_tokens changes; saved BM25 matrices from another version are rebuilt on load
+BM25_TOKENIZER_VERSION = 2
+
+# Dense search and BM25 are independent and both spend their time outside the GIL
+_search_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hlai-search")
+
+
+def _build_dense_index(embs: np.ndarray, quantization: str = "fp16") -> faiss.Index:
+    # Vectors are L2-normalized, so inner product == cosine; codes are stored as fp16 or int8 (1/2 or 1/4 the bytes scanned)
+    embs = np.ascontiguousarray(embs, dtype=np.float32)
+    qtype = faiss.ScalarQuantizer.QT_8bit if quantization == "int8" else faiss.ScalarQuantizer.QT_fp16
+    if embs.shape[0] > HNSW_MIN_CHUNKS:
+        index = faiss.IndexHNSWSQ(embs.shape[1], qtype, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    else:
+        index = faiss.IndexScalarQuantizer(embs.shape[1], qtype, faiss.METRIC_INNER_PRODUCT)
+    index.train(embs)
+    index.add(embs)
+    return index
+
+
+def _read_dense_index(path: str) -> faiss.Index:
+    # mmap the stored codes so the OS pages vectors in on demand instead of copying them into RSS
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+@functools.lru_cache(maxsize=1)
+def _gpu_resources() -> Any:
+    return faiss.StandardGpuResources()
+
+
+def _bm25_tokens(text: str) -> List[str]:
+    # isascii() is O(1); non-ASCII text still needs full Unicode lowercasing first
+    return (text if text.isascii() else text.lower()).translate(_TR).split()
+
+
+def _bm25_matrix(corpus: List[List[str]]) -> Tuple[Any, Dict[str, int]]:
+    # Precompute per-(doc, term) BM25 weights so scoring a query is one sparse matvec
+    vocab: Dict[str, int] = {}
+    indptr, cols, tfs = [0], [], []
+    for toks in corpus:
+        counts: Dict[int, int] = {}
+        for t in toks:
+            j = vocab.setdefault(t, len(vocab))
+            counts[j] = counts.get(j, 0) + 1
+        cols.extend(counts.keys())
+        tfs.extend(counts.values())
+        indptr.append(len(cols))
+    n = len(corpus)
+    cols_a = np.asarray(cols, dtype=np.int32)
+    tf = np.asarray(tfs, dtype=np.float32)
+    doc_len = np.array([len(toks) for toks in corpus], dtype=np.float32)
+    avgdl = float(doc_len.mean()) if n and doc_len.sum() > 0 else 1.0
+    df = np.bincount(cols_a, minlength=len(vocab)).astype(np.float64)
+    idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+    # Terms in more than half the docs get a small positive floor instead of a negative idf
+    if len(idf):
+        idf[idf < 0] = BM25_EPSILON * idf.mean()
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avgdl)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    data = idf[cols_a] * tf * (BM25_K1 + 1) / (tf + norm[rows])
+    mat = sp.csr_matrix((data.astype(np.float32), cols_a, np.asarray(indptr, dtype=np.int64)), shape=(n, len(vocab)))
+    return mat, vocab
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    # O(n) selection of the k best, then a sort of just those k (descending)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _write_replace(path: str, write: Any) -> None:
+    # Write then rename: faiss.index, meta.arrow and embeddings.npy are memory-mapped by readers,
+    # and truncating a mapped file in place can SIGBUS them
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _save_to(path: str, save: Any, data: Any) -> None:
+    # Through a file object, so np.save/save_npz do not append their own extension to the temp name
+    with open(path, "wb") as f:
+        save(f, data)
+
+
+def _wants_gpu(device: str | None) -> bool:
+    return bool(device) and device.startswith("cuda") and hasattr(faiss, "StandardGpuResources")
+
+
+def _to_device(index: faiss.Index, embs: np.ndarray, device: str | None) -> faiss.Index:
+    # Keep vectors on the encoder's GPU so search runs there too; no-op on CPU or CPU-only FAISS builds
+    if not _wants_gpu(device):
+        return index
+    gpu_id = int(device.split(":", 1)[1]) if ":" in device else 0
+    flat = faiss.IndexFlatIP(embs.shape[1])
+    flat.add(np.ascontiguousarray(embs, dtype=np.float32))
+    co = faiss.GpuClonerOptions()
+    co.useFloat16 = True
+    return faiss.index_cpu_to_gpu(_gpu_resources(), gpu_id, flat, co)
+
+
+def _is_gpu_index(index: faiss.Index) -> bool:
+    return hasattr(faiss, "GpuIndex") and isinstance(index, faiss.GpuIndex)
+
+
+class ArrowStrings(Sequence):
+    # Zero-copy view of an Arrow string column; values are materialized one row at a time
+    def __init__(self, column: pa.ChunkedArray) -> None:
+        self._column = column
+
+    def __len__(self) -> int:
+        return len(self._column)
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return self._column[i].to_pylist()
+        return self._column[i].as_py()
+
+    def __iter__(self) -> Any:
+        return iter(self._column.to_pylist())
+
+
+REF_KINDS = ("figure", "table", "equation")
+
+
+class ArrowRefs(Sequence):
+    # Cross-refs stored as one list<string> column per kind; a row's dict is built only when it is read
+    def __init__(self, table: pa.Table) -> None:
+        self._columns = [table.column(f"refs_{kind}") for kind in REF_KINDS]
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return {kind: col[i].as_py() or [] for kind, col in zip(REF_KINDS, self._columns)}
+
+    def __iter__(self) -> Any:
+        cols = [col.to_pylist() for col in self._columns]
+        for vals in zip(*cols):
+            yield {kind: v or [] for kind, v in zip(REF_KINDS, vals)}
+
+
+class ChunkMeta(Sequence):
+    # Read-only row view over ChunkIndex columns, so `index.meta[i]` keeps returning a dict
+    def __init__(self, index: "ChunkIndex") -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index.ids)
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self._index.row(j) for j in range(*i.indices(len(self)))]
+        return self._index.row(i)
 
 
 class ChunkIndex:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", device: str | None = None) -> None:
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", device: str | None = None, quantization: str | None = None,
+                 rrf_k: int = 60, dense_weight: float = 1.0, bm25_weight: float = 1.0) -> None:
         self.model_name = model_name
         self.device = device
-        self.model: SentenceTransformer | None = None
-        self.index: NearestNeighbors | None = None
+        # Opt-in ONNX Runtime encoder (export once with `python -m src.onnx_encoder`)
+        self.use_onnx = os.environ.get("HLAI_ONNX") == "1"
+        self.model: Any | None = None
+        # In-process fallback for when the shared query cache is unavailable
+        self._qcache = functools.lru_cache(maxsize=1024)(self._encode_query_uncached)
+        self.index: faiss.Index | None = None
+        # Stored embedding precision: "fp16", or "int8" with one scale per vector (opt in with HLAI_EMB_QUANT=int8)
+        self.quantization = quantization or os.environ.get("HLAI_EMB_QUANT", "fp16")
         self.embeddings: np.ndarray | None = None
-        self.meta: List[Dict[str, Any]] = []
-        self._bm25: Any | None = None
-        self._bm25_corpus: List[List[str]] = []
+        self.scales: np.ndarray | None = None
+        # Chunk metadata as parallel columns (SoA); dicts are only built per returned hit via row()
+        self.ids: List[str] = []
+        self.paper_ids: List[str] = []
+        self.pages: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.types: np.ndarray = np.zeros(0, dtype=np.int8)
+        self.contents: Sequence[str] = []
+        self.refs: Sequence[Dict[str, List[str]]] = []
+        self._bm25: Any | None = None  # (docs x vocab) CSR of BM25 weights
+        self._vocab: Dict[str, int] = {}
+        # Hybrid fusion: score = sum(weight / (rrf_k + rank)) over the dense and BM25 rankings
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+        self.bm25_weight = bm25_weight
 
-    def _get_model(self) -> SentenceTransformer:
+    def _get_model(self) -> Any:
         if self.model is None:
-            self.model = SentenceTransformer(self.model_name, device=self.device)
+            self.model = _get_encoder(self.model_name, self.device, self.use_onnx)
         return self.model
 
+    @property
+    def meta(self) -> ChunkMeta:
+        return ChunkMeta(self)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {
+            "id": self.ids[i],
+            "type": CHUNK_TYPES[self.types[i]],
+            "paper_id": self.paper_ids[i],
+            "page": int(self.pages[i]),
+            "content": self.contents[i],
+            "refs": self.refs[i],
+        }
+
+    def _set_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self.ids = [r.get("id") or compute_id(r.get("paper_id", ""), str(r.get("page", "")), r.get("type", ""), r.get("content", "")) for r in rows]
+        self.paper_ids = [r.get("paper_id", "") for r in rows]
+        self.pages = np.array([int(r.get("page") or 0) for r in rows], dtype=np.int32)
+        self.types = np.array([CHUNK_TYPES.index(r.get("type", "text")) for r in rows], dtype=np.int8)
+        self.contents = [r.get("content", "") for r in rows]
+        self.refs = [r.get("refs") or {} for r in rows]
+
+    def _build_bm25(self) -> None:
+        if sp is not None:
+            self._bm25, self._vocab = _bm25_matrix([_bm25_tokens(t) for t in self.contents])
+        else:
+            self._bm25 = None
+            self._vocab = {}
+
+    @property
+    def _cache_model_key(self) -> str:
+        return f"{self.model_name}:onnx" if self.use_onnx else self.model_name
+
     def build(self, chunks: List[Dict[str, Any]], n_neighbors: int = 8) -> None:
         texts = [c["content"] for c in chunks]
         model = self._get_model()
-        embs = model.encode(texts, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True, batch_size=64)
-        self.embeddings = embs.astype("float32")
-        self.meta = []
-        for ch in chunks:
-            ch_id = compute_id(ch.get("paper_id", ""), str(ch.get("page", "")), ch.get("type", ""), ch.get("content", ""))
-            m = dict(ch)
-            m["id"] = ch_id
-            self.meta.append(m)
-        self.index = NearestNeighbors(n_neighbors=n_neighbors, metric="cosine")
-        self.index.fit(self.embeddings)
+        # Encode in length order so each batch pads to similar lengths, then restore chunk order
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        with torch.inference_mode():
+            sorted_embs = model.encode([texts[i] for i in order], convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True, batch_size=128)
+        embs = np.empty_like(sorted_embs, dtype=np.float32)
+        embs[order] = sorted_embs
+        self._store_embeddings(embs)
+        self._set_rows(chunks)
+        self.index = _to_device(_build_dense_index(embs, self.quantization), embs, self.device)
         # Build BM25 if available
-        if BM25Okapi is not None:
-            self._bm25_corpus = [t.lower().split() for t in texts]
-            self._bm25 = BM25Okapi(self._bm25_corpus)
+        self._build_bm25()
+
+    def _store_embeddings(self, embs: np.ndarray) -> None:
+        if self.quantization == "int8":
+            scale = 127.0 / np.clip(np.abs(embs).max(axis=1, keepdims=True), 1e-12, None)
+            self.embeddings = np.round(embs * scale).astype(np.int8)
+            self.scales = scale.reshape(-1).astype(np.float32)
         else:
-            self._bm25 = None
-            self._bm25_corpus = []
+            self.embeddings = embs.astype(np.float16)
+            self.scales = None
+
+    def _dense_vectors(self) -> np.ndarray:
+        embs = np.asarray(self.embeddings, dtype=np.float32)
+        if self.scales is not None:
+            embs = embs / self.scales[:, None]
+        return embs
+
+    def _encode_query_uncached(self, text: str) -> np.ndarray:
+        return self._get_model().encode([text], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)[0].astype("float32")
+
+    def encode_text(self, text: str) -> np.ndarray:
+        # Bypasses the query caches, for one-off texts (e.g. chat transcripts) that will never repeat
+        return self._encode_query_uncached(text)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        # Whitespace-only variants of a query (UI retries, pasted text) share one embedding
+        text = " ".join(text.split())
+        cache = get_query_cache()
+        if cache is None:
+            return self._qcache(text)
+        return cache.get_or_encode(self._cache_model_key, text, self._encode_query_uncached)
+
+    def encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        texts = [" ".join(t.split()) for t in texts]
+        cache = get_query_cache()
+        keys = [QueryEmbeddingCache.key(self._cache_model_key, t) for t in texts]
+        vecs: List[np.ndarray | None] = [cache.get(k) if cache is not None else None for k in keys]
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        if missing:
+            with torch.inference_mode():
+                embs = self._get_model().encode([texts[i] for i in missing], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False, batch_size=batch_size).astype("float32")
+            for i, emb in zip(missing, embs):
+                vecs[i] = emb
+                if cache is not None:
+                    cache.put(keys[i], emb)
+        return np.stack(vecs)
 
     def query_dense(self, text: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        return self.query_dense_vec(self.encode_query(text), top_k=top_k)
+
+    def query_dense_vec(self, vec: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
         if self.index is None or self.embeddings is None:
             raise RuntimeError("Index not built")
-        q = self._get_model().encode([text], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False).astype("float32")
-        distances, indices = self.index.kneighbors(q, n_neighbors=min(top_k, len(self.meta)))
-        sim = 1.0 - distances[0]
-        return list(zip(indices[0].tolist(), sim.tolist()))
+        if simsimd is not None and len(self.ids) <= SIMSIMD_MAX_CHUNKS and not _is_gpu_index(self.index):
+            return self._query_dense_simsimd(vec, top_k)
+        q = np.ascontiguousarray(vec, dtype=np.float32).reshape(1, -1)
+        sims, indices = self.index.search(q, min(top_k, len(self.ids)))
+        return [(i, s) for i, s in zip(indices[0].tolist(), sims[0].tolist()) if i >= 0]
+
+    def _query_dense_simsimd(self, vec: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        # SimSIMD dispatches f16/i8-native SIMD kernels, so the stored matrix is scored without upcasting
+        if self.scales is not None:
+            vec = np.asarray(vec, dtype=np.float32)
+            q_scale = 127.0 / max(float(np.abs(vec).max()), 1e-12)
+            q = np.round(vec * q_scale).astype(np.int8).reshape(1, -1)
+            dots = np.asarray(simsimd.cdist(q, self.embeddings, metric="dot"))[0]
+            sims = dots / (self.scales * q_scale)
+        else:
+            q = np.ascontiguousarray(vec, dtype=self.embeddings.dtype).reshape(1, -1)
+            sims = 1.0 - np.asarray(simsimd.cdist(q, self.embeddings, metric="cosine"))[0]
+        return [(int(i), float(sims[i])) for i in _top_k(sims, top_k)]
 
     def query_bm25(self, text: str, top_k: int = 5) -> List[Tuple[int, float]]:
         if self._bm25 is None:
             return []
-        scores = self._bm25.get_scores(text.lower().split())
-        idxs = np.argsort(scores)[::-1][: min(top_k, len(scores))]
-        return [(int(i), float(scores[int(i)])) for i in idxs]
-
-    def retrieve(self, text: str, top_k: int = 10, alpha: float = 0.6) -> List[Tuple[int, float]]:
-        dense = self.query_dense(text, top_k=top_k)
-        bm25 = self.query_bm25(text, top_k=top_k)
-        if not bm25:
-            # BM25 not available; return dense only
-            return dense[:top_k]
+        cols = [self._vocab[t] for t in _bm25_tokens(text) if t in self._vocab]
+        scores = np.zeros(self._bm25.shape[0], dtype=np.float32)
+        if cols:
+            # Repeated query terms count repeatedly, as in rank_bm25
+            q = np.bincount(cols, minlength=self._bm25.shape[1]).astype(np.float32)
+            scores = self._bm25 @ q
+        return [(int(i), float(scores[i])) for i in _top_k(scores, top_k)]
+
+    def retrieve(self, text: str, top_k: int = 10, q_vec: np.ndarray | None = None) -> List[Tuple[int, float]]:
+        if q_vec is None:
+            q_vec = self.encode_query(text)
+        depth = max(top_k, RRF_DEPTH)
+        fut_b = _search_pool.submit(self.query_bm25, text, depth)
+        dense = self.query_dense_vec(q_vec, top_k=depth)
+        # Docs sharing no term with the query have score 0 and must not earn rank credit
+        bm25 = [(i, s) for i, s in fut_b.result() if s > 0]
+        return self._fuse(dense, bm25, top_k)
+
+    def _fuse(self, dense: List[Tuple[int, float]], bm25: List[Tuple[int, float]], top_k: int) -> List[Tuple[int, float]]:
+        # Reciprocal Rank Fusion: only ranks matter, so no score normalization is needed.
+        # Dense-only results are scored the same way, so every path returns comparable RRF scores
         scores: Dict[int, float] = {}
-        # Normalize bm25 to [0,1]
-        bm_vals = np.array([s for _, s in bm25])
-        if bm_vals.max() > 0:
-            bm_norm = {i: float(s / bm_vals.max()) for i, s in bm25}
-        else:
-            bm_norm = {i: 0.0 for i, s in bm25}
-        for i, s in dense:
-            scores[i] = scores.get(i, 0.0) + alpha * s
-        for i, s in bm_norm.items():
-            scores[i] = scores.get(i, 0.0) + (1 - alpha) * s
-        combined = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
-        return combined
+        for r, (i, _) in enumerate(dense, start=1):
+            scores[i] = scores.get(i, 0.0) + self.dense_weight / (self.rrf_k + r)
+        for r, (i, _) in enumerate(bm25, start=1):
+            scores[i] = scores.get(i, 0.0) + self.bm25_weight / (self.rrf_k + r)
+        ids = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        fused = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        return [(int(ids[j]), float(fused[j])) for j in _top_k(fused, top_k)]
 
     def query(self, text: str, top_k: int = 5) -> List[Tuple[int, float]]:
         return self.retrieve(text, top_k=top_k)
 
+    def query_with_vec(self, vec: np.ndarray, top_k: int = 5, text: str | None = None) -> List[Tuple[int, float]]:
+        # Skips the encoder; BM25 still needs the raw text, so without it this is dense-only
+        if text is None:
+            return self._fuse(self.query_dense_vec(vec, top_k=top_k), [], top_k)
+        return self.retrieve(text, top_k=top_k, q_vec=vec)
+
+    def _meta_table(self) -> pa.Table:
+        return pa.table({
+            "id": pa.array(self.ids, type=pa.string()),
+            "paper_id": pa.array(self.paper_ids, type=pa.string()),
+            "page": pa.array(self.pages, type=pa.int32()),
+            "type": pa.array(self.types, type=pa.int8()),
+            "content": pa.array(list(self.contents), type=pa.string()),
+            **{f"refs_{kind}": pa.array([r.get(kind) or [] for r in self.refs], type=pa.list_(pa.string())) for kind in REF_KINDS},
+        })
+
     def save(self, out_dir: str) -> None:
         ensure_dir(out_dir)
-        np.save(os.path.join(out_dir, "embeddings.npy"), self.embeddings)
-        with open(os.path.join(out_dir, "meta.pkl"), "wb") as f:
-            pickle.dump(self.meta, f)
+        _write_replace(os.path.join(out_dir, "embeddings.npy"), lambda tmp: _save_to(tmp, np.save, np.asarray(self.embeddings)))
+        if self.scales is not None:
+            _write_replace(os.path.join(out_dir, "scales.npy"), lambda tmp: _save_to(tmp, np.save, self.scales))
+        cpu_index = faiss.index_gpu_to_cpu(self.index) if _is_gpu_index(self.index) else self.index
+        _write_replace(os.path.join(out_dir, "faiss.index"), lambda tmp: faiss.write_index(cpu_index, tmp))
+        table = self._meta_table()
+
+        def write_meta(tmp: str) -> None:
+            with pa.OSFile(tmp, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        _write_replace(os.path.join(out_dir, "meta.arrow"), write_meta)
+        if self._bm25 is not None:
+            _write_replace(os.path.join(out_dir, "bm25.npz"), lambda tmp: _save_to(tmp, sp.save_npz, self._bm25))
+            terms = sorted(self._vocab, key=self._vocab.__getitem__)
+            _write_replace(os.path.join(out_dir, "bm25_vocab.json"), lambda tmp: write_json(tmp, {"tokenizer": BM25_TOKENIZER_VERSION, "terms": terms}))
         with open(os.path.join(out_dir, "model_name.txt"), "w", encoding="utf-8") as f:
             f.write(self.model_name)
 
     @staticmethod
-    def load(in_dir: str) -> "ChunkIndex":
+    def load(in_dir: str, device: str | None = None) -> "ChunkIndex":
         with open(os.path.join(in_dir, "model_name.txt"), "r", encoding="utf-8") as f:
             model_name = f.read().strip()
-        ci = ChunkIndex(model_name=model_name)
-        with open(os.path.join(in_dir, "meta.pkl"), "rb") as f:
-            ci.meta = pickle.load(f)
-        ci.embeddings = np.load(os.path.join(in_dir, "embeddings.npy"))
-        ci.index = NearestNeighbors(n_neighbors=8, metric="cosine")
-        ci.index.fit(ci.embeddings)
-        # Rebuild BM25 from meta if available
-        if BM25Okapi is not None:
-            texts = [m.get("content", "") for m in ci.meta]
-            ci._bm25_corpus = [t.lower().split() for t in texts]
-            ci._bm25 = BM25Okapi(ci._bm25_corpus)
+        ci = ChunkIndex(model_name=model_name, device=device)
+        arrow_path = os.path.join(in_dir, "meta.arrow")
+        if os.path.exists(arrow_path):
+            table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+            ci.ids = table.column("id").to_pylist()
+            ci.paper_ids = table.column("paper_id").to_pylist()
+            ci.pages = table.column("page").to_numpy()
+            ci.types = table.column("type").to_numpy()
+            ci.contents = ArrowStrings(table.column("content"))
+            if "refs" in table.column_names:
+                # Earlier meta.arrow files kept refs as one JSON string per row
+                ci.refs = [json.loads(r) for r in table.column("refs").to_pylist()]
+            else:
+                ci.refs = ArrowRefs(table)
+        else:
+            # Older indexes stored meta as a pickled list of dicts
+            with open(os.path.join(in_dir, "meta.pkl"), "rb") as f:
+                ci._set_rows(pickle.load(f))
+        # Memory-mapped: pages are read on demand and shared between processes serving the same index
+        embs = np.load(os.path.join(in_dir, "embeddings.npy"), mmap_mode="r")
+        scales_path = os.path.join(in_dir, "scales.npy")
+        if embs.dtype == np.int8 and os.path.exists(scales_path):
+            ci.quantization = "int8"
+            ci.embeddings = embs
+            ci.scales = np.load(scales_path)
+        else:
+            # The stored file, not HLAI_EMB_QUANT, decides the precision of a loaded index
+            ci.quantization = "fp16"
+            # Older indexes stored fp32; those are converted in memory
+            ci.embeddings = embs if embs.dtype == np.float16 else embs.astype(np.float16)
+        index_path = os.path.join(in_dir, "faiss.index")
+        ci.index = _read_dense_index(index_path) if os.path.exists(index_path) else _build_dense_index(ci._dense_vectors(), ci.quantization)
+        if _wants_gpu(device):
+            ci.index = _to_device(ci.index, ci._dense_vectors(), device)
+        bm25_path = os.path.join(in_dir, "bm25.npz")
+        vocab_path = os.path.join(in_dir, "bm25_vocab.json")
+        vocab = read_json(vocab_path) if sp is not None and os.path.exists(bm25_path) and os.path.exists(vocab_path) else None
+        if isinstance(vocab, dict) and vocab.get("tokenizer") == BM25_TOKENIZER_VERSION:
+            ci._bm25 = sp.load_npz(bm25_path).tocsr()
+            ci._vocab = {t: j for j, t in enumerate(vocab["terms"])}
         else:
-            ci._bm25 = None
-            ci._bm25_corpus = []
+            # Older indexes or another tokenizer: rebuild BM25 from the content column
+            ci._build_bm25()
         return ci
@@ -0,0 +1,68 @@
+import os
+import argparse
+from typing import List
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "onnx")
+
+
+def default_model_dir(model_name: str) -> str:
+    return os.path.join(DEFAULT_ONNX_DIR, model_name.replace("/", "__"))
+
+
+class OnnxEncoder:
+    # Drop-in for the subset of SentenceTransformer.encode used by ChunkIndex (mean pooling, as in MiniLM)
+    def __init__(self, model_dir: str, max_length: int = 256) -> None:
+        self.model_dir = model_dir
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        quantized = os.path.join(model_dir, "model_quantized.onnx")
+        model_path = quantized if os.path.exists(quantized) else os.path.join(model_dir, "model.onnx")
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = os.cpu_count() or 1
+        opts.enable_mem_pattern = True
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        available = ort.get_available_providers()
+        providers = [p for p in ["CUDAExecutionProvider", "CPUExecutionProvider"] if p in available]
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=providers)
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        self._output_name = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+
+    def encode(self, texts: List[str], batch_size: int = 64, normalize_embeddings: bool = True, **_: object) -> np.ndarray:
+        out: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self._input_names}
+            hidden = self.session.run([self._output_name], feeds)[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            emb = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            out.append(emb.astype(np.float32))
+        if not out:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(out)
+
+
+def export(model_name: str, out_dir: str, quantize: bool = True) -> str:
+    # Install-time step, equivalent to `optimum-cli export onnx --task feature-extraction`
+    from optimum.exporters.onnx import main_export
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    main_export(model_name, output=out_dir, task="feature-extraction")
+    if quantize:
+        quantize_dynamic(os.path.join(out_dir, "model.onnx"), os.path.join(out_dir, "model_quantized.onnx"), weight_type=QuantType.QInt8)
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--out", type=str, default=None, help="Output directory (defaults to data/onnx/<model>)")
+    parser.add_argument("--no_quantize", action="store_true", help="Skip INT8 dynamic quantization")
+    args = parser.parse_args()
+    print(export(args.model, args.out or default_model_dir(args.model), quantize=not args.no_quantize))
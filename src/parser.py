@@ -1,67 +1,130 @@
-from typing import List, Dict, Any
-import pdfplumber
+from typing import List, Dict, Any, Optional, Tuple
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import re
+try:
+    import pymupdf  # type: ignore
+except Exception:  # pragma: no cover
+    pymupdf = None  # fall back to pdfplumber
+try:
+    import pdfplumber  # type: ignore
+except Exception:  # pragma: no cover
+    pdfplumber = None
 from .utils import normalize_whitespace, naive_sentence_split, extract_cross_refs
 
 CAPTION_RE = re.compile(r"^(Figure|Fig\.|Table)\s+\d+[a-z]?[:.)\-]\s*(.+)$", re.IGNORECASE)
+# Below this many pages, worker startup costs more than it saves
+PARALLEL_MIN_PAGES = 16
 
 
-def parse_pdf(pdf_path: str, paper_id: str) -> List[Dict[str, Any]]:
+Table = List[List[Optional[str]]]  # rows of cells, as returned by either backend
+
+
+def _extract_pymupdf(page: Any) -> Tuple[str, List[Table]]:
+    # MuPDF's C text extraction; find_tables is PyMuPDF's own table detector
+    text = page.get_text("text") or ""
+    try:
+        tables = [t.extract() for t in page.find_tables().tables]
+    except Exception:
+        tables = []
+    return text, tables
+
+
+def _extract_pdfplumber(page: Any) -> Tuple[str, List[Table]]:
+    text = page.extract_text() or ""
+    try:
+        tables = page.extract_tables() or []
+    except Exception:
+        tables = []
+    return text, tables
+
+
+def _parse_page(text: str, tables: List[Table], page_num: int, paper_id: str) -> List[Dict[str, Any]]:
+    chunks: List[Dict[str, Any]] = []
+    text = normalize_whitespace(text)
+
+    # Convert tables to TSV-like strings
+    tables_data: List[str] = []
+    for t in tables:
+        rows = ["\t".join([c if c is not None else "" for c in row]) for row in t]
+        tables_data.append("\n".join(rows))
+
+    # Extract captions heuristically from text lines
+    captions: List[str] = []
+    for line in text.split("\n"):
+        line = line.strip()
+        # Every caption starts with F or T; skip the regex for all other lines
+        if line and line[0] in "FfTt" and CAPTION_RE.match(line):
+            captions.append(line)
+
+    # Main text chunks
+    if text:
+        sentences = naive_sentence_split(text)
+        if sentences:
+            chunks.append({
+                "type": "text",
+                "paper_id": paper_id,
+                "page": page_num,
+                "content": text,
+                "sentences": sentences,
+                "refs": extract_cross_refs(text),
+            })
+
+    for cap in captions:
+        chunks.append({
+            "type": "caption",
+            "paper_id": paper_id,
+            "page": page_num,
+            "content": cap,
+            "sentences": [cap],
+            "refs": extract_cross_refs(cap),
+        })
+
+    for tsv in tables_data:
+        chunks.append({
+            "type": "table",
+            "paper_id": paper_id,
+            "page": page_num,
+            "content": tsv,
+            "sentences": [tsv],
+            "refs": extract_cross_refs(tsv),
+        })
+    return chunks
+
+
+def _parse_page_range(pdf_path: str, start: int, end: int, paper_id: str) -> List[Dict[str, Any]]:
+    # Each worker opens its own handle; document objects cannot be shared across processes
     chunks: List[Dict[str, Any]] = []
+    if pymupdf is not None:
+        with pymupdf.open(pdf_path) as doc:
+            for page_index in range(start, end):
+                chunks.extend(_parse_page(*_extract_pymupdf(doc[page_index]), page_index + 1, paper_id))
+        return chunks
     with pdfplumber.open(pdf_path) as pdf:
-        for page_index, page in enumerate(pdf.pages):
-            page_num = page_index + 1
-            text = page.extract_text() or ""
-            text = normalize_whitespace(text)
-
-            # Extract tables
-            tables_data: List[str] = []
-            try:
-                tables = page.extract_tables() or []
-                for t in tables:
-                    # Convert table to TSV-like string
-                    rows = ["\t".join([c if c is not None else "" for c in row]) for row in t]
-                    tables_data.append("\n".join(rows))
-            except Exception:
-                pass
-
-            # Extract captions heuristically from text lines
-            captions: List[str] = []
-            for line in text.split("\n"):
-                m = CAPTION_RE.match(line.strip())
-                if m:
-                    captions.append(line.strip())
-
-            # Main text chunks
-            if text:
-                sentences = naive_sentence_split(text)
-                if sentences:
-                    chunks.append({
-                        "type": "text",
-                        "paper_id": paper_id,
-                        "page": page_num,
-                        "content": text,
-                        "sentences": sentences,
-                        "refs": extract_cross_refs(text),
-                    })
-
-            for cap in captions:
-                chunks.append({
-                    "type": "caption",
-                    "paper_id": paper_id,
-                    "page": page_num,
-                    "content": cap,
-                    "sentences": [cap],
-                    "refs": extract_cross_refs(cap),
-                })
-
-            for tsv in tables_data:
-                chunks.append({
-                    "type": "table",
-                    "paper_id": paper_id,
-                    "page": page_num,
-                    "content": tsv,
-                    "sentences": [tsv],
-                    "refs": extract_cross_refs(tsv),
-                })
+        for page_index in range(start, end):
+            chunks.extend(_parse_page(*_extract_pdfplumber(pdf.pages[page_index]), page_index + 1, paper_id))
+    return chunks
+
+
+def _page_count(pdf_path: str) -> int:
+    if pymupdf is not None:
+        with pymupdf.open(pdf_path) as doc:
+            return doc.page_count
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def parse_pdf(pdf_path: str, paper_id: str, workers: int = 1) -> List[Dict[str, Any]]:
+    num_pages = _page_count(pdf_path)
+    if workers <= 1 or num_pages < PARALLEL_MIN_PAGES:
+        return _parse_page_range(pdf_path, 0, num_pages, paper_id)
+    step = -(-num_pages // workers)
+    ranges = [(s, min(s + step, num_pages)) for s in range(0, num_pages, step)]
+    chunks: List[Dict[str, Any]] = []
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=ctx) as ex:
+        futures = [ex.submit(_parse_page_range, pdf_path, s, e, paper_id) for s, e in ranges]
+        # Collected in submission order, so chunks stay in page order
+        for fut in futures:
+            chunks.extend(fut.result())
     return chunks
@@ -1,18 +1,56 @@
-from typing import List, Dict
+import os
+from typing import Any, List, Dict
+import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 
 
+_INSTRUCTION = " Use only the provided context. If the context does not contain the answer, respond exactly: Insufficient evidence.\n\nContext:\n"
+
+
+def _load_seq2seq(model_name: str, device: str | None) -> Any:
+    on_cuda = bool(device) and device.startswith("cuda")
+    # Separate from the encoder's HLAI_ONNX: enabling this exports flan-T5 on first use
+    if os.environ.get("HLAI_ONNX_GENERATOR") == "1":
+        # ONNX Runtime decoder with KV cache; exported once to data/onnx/<model> and reused afterwards
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        from .onnx_encoder import default_model_dir
+
+        provider = "CUDAExecutionProvider" if on_cuda else "CPUExecutionProvider"
+        onnx_dir = default_model_dir(model_name)
+        if os.path.exists(os.path.join(onnx_dir, "config.json")):
+            return ORTModelForSeq2SeqLM.from_pretrained(onnx_dir, provider=provider, use_cache=True)
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, provider=provider, use_cache=True)
+        model.save_pretrained(onnx_dir)
+        return model
+    dtype = torch.float32
+    if on_cuda:
+        # T5 overflows in fp16 on some layers; bf16 keeps fp32 range where the GPU supports it
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=dtype)
+    if device:
+        model.to(device)
+    return model.eval()
+
+
 class SimpleGenerator:
-    def __init__(self, model_name: str = "google/flan-t5-small", device: str | None = None, style: str = "concise") -> None:
+    def __init__(self, model_name: str = "google/flan-t5-small", device: str | None = None, style: str = "concise", max_input_tokens: int = 2048) -> None:
         self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-        if device:
-            self.model.to(device)
-        self.style = style
+        self.model = _load_seq2seq(model_name, device)
+        self.max_input_tokens = max_input_tokens
+        # Fixed prompt pieces are tokenized once; per request only the contexts and question are tokenized
+        self._prefix_ids: Dict[str, List[int]] = {}
+        self._question_ids = self._encode("\n\nQuestion: ")
+        self._answer_ids = self._encode("\nAnswer (with citations):")
+        self.set_style(style)
+
+    def _encode(self, text: str) -> List[int]:
+        return self.tokenizer.encode(text, add_special_tokens=False)
 
     def set_style(self, style: str) -> None:
         self.style = style
+        if style not in self._prefix_ids:
+            self._prefix_ids[style] = self._encode(self._style_prefix() + _INSTRUCTION)
 
     def _style_prefix(self) -> str:
         if self.style == "detailed":
@@ -35,12 +73,15 @@ class SimpleGenerator:
         joined = []
         for cid, ctx in zip(ids, contexts):
             joined.append(f"[{cid}] {ctx}")
-        context_str = "\n\n".join(joined)
-        style_prefix = self._style_prefix()
-        prompt = (
-            f"{style_prefix} Use only the provided context. If the context does not contain the answer, respond exactly: Insufficient evidence.\n\n"
-            f"Context:\n{context_str}\n\nQuestion: {query}\nAnswer (with citations):"
-        )
-        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=2048)
-        outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+        context_ids = self._encode("\n\n".join(joined))
+        query_ids = self._encode(query)
+        prefix_ids = self._prefix_ids[self.style]
+        # Truncate the context rather than the question when the prompt is too long
+        num_special = self.tokenizer.num_special_tokens_to_add(pair=False)
+        budget = self.max_input_tokens - num_special - len(prefix_ids) - len(self._question_ids) - len(query_ids) - len(self._answer_ids)
+        context_ids = context_ids[:max(0, budget)]
+        prompt_ids = self.tokenizer.build_inputs_with_special_tokens(prefix_ids + context_ids + self._question_ids + query_ids + self._answer_ids)
+        input_ids = torch.tensor([prompt_ids], dtype=torch.long, device=self.model.device)
+        with torch.inference_mode():
+            outputs = self.model.generate(input_ids=input_ids, attention_mask=torch.ones_like(input_ids), max_new_tokens=max_new_tokens, use_cache=True)
         return self.tokenizer.decode(outputs[0], skip_special_tokens=True).strip()
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import hashlib
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import numpy as np
+from .utils import ensure_dir, LRUCache
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "index", "query_cache.sqlite")
+
+
+class QueryEmbeddingCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, maxsize: int = 4096, warm_rows: int = 1024) -> None:
+        ensure_dir(os.path.dirname(path) or ".")
+        self.path = path
+        self._mem = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, vec BLOB)")
+        self._conn.commit()
+        self._warm(warm_rows)
+
+    @staticmethod
+    def key(model_name: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model_name}|{text}".encode("utf-8")).digest()
+
+    def _warm(self, n: int) -> None:
+        # INSERT OR REPLACE assigns a fresh rowid, so the highest rowids are the most recent entries
+        with self._lock:
+            rows = self._conn.execute("SELECT hash, vec FROM embeddings ORDER BY rowid DESC LIMIT ?", (n,)).fetchall()
+        for h, v in reversed(rows):
+            self._mem.put(bytes(h), np.frombuffer(v, dtype=np.float32))
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        vec = self._mem.get(key)
+        if vec is not None:
+            return vec
+        with self._lock:
+            row = self._conn.execute("SELECT vec FROM embeddings WHERE hash = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        vec = np.frombuffer(row[0], dtype=np.float32)
+        self._mem.put(key, vec)
+        return vec
+
+    def put(self, key: bytes, vec: np.ndarray) -> None:
+        vec = np.ascontiguousarray(vec, dtype=np.float32)
+        self._mem.put(key, vec)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO embeddings (hash, vec) VALUES (?, ?)", (key, vec.tobytes()))
+            self._conn.commit()
+
+    def get_or_encode(self, model_name: str, text: str, encode: Callable[[str], np.ndarray]) -> np.ndarray:
+        key = self.key(model_name, text)
+        vec = self.get(key)
+        if vec is None:
+            vec = np.ascontiguousarray(encode(text), dtype=np.float32)
+            self.put(key, vec)
+        return vec
+
+
+class SemanticCache:
+    def __init__(self, threshold: float = 0.92, ttl: float = 600.0, maxsize: int = 1024) -> None:
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._vecs: np.ndarray | None = None
+        self._entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _remove(self, positions: List[int]) -> None:
+        keep = sorted(set(range(len(self._entries))) - set(positions))
+        self._entries = [self._entries[i] for i in keep]
+        self._vecs = self._vecs[keep] if keep and self._vecs is not None else None
+
+    def lookup(self, vec: np.ndarray, scope: Hashable) -> Any | None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [i for i, e in enumerate(self._entries) if now - e["created"] > self.ttl]
+            if expired:
+                self._remove(expired)
+            if self._vecs is None:
+                return None
+            # Embeddings are L2-normalized, so the inner product is the cosine similarity
+            sims = self._vecs @ np.asarray(vec, dtype=np.float32)
+            for i, e in enumerate(self._entries):
+                if e["scope"] != scope:
+                    sims[i] = -np.inf
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                return None
+            self._entries[best]["last_used"] = now
+            return self._entries[best]["value"]
+
+    def add(self, vec: np.ndarray, scope: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        vec = np.asarray(vec, dtype=np.float32)[None, :]
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                lru = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])
+                self._remove([lru])
+            self._entries.append({"scope": scope, "value": value, "created": now, "last_used": now})
+            self._vecs = vec if self._vecs is None else np.vstack([self._vecs, vec])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._vecs = None
+
+
+_cache: QueryEmbeddingCache | None = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache | None:
+    global _cache, _cache_failed
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = QueryEmbeddingCache(os.environ.get("HLAI_QUERY_CACHE", DEFAULT_CACHE_PATH))
+            except (sqlite3.Error, OSError):
+                # Read-only or unavailable storage: encode without caching
+                _cache_failed = True
+    return _cache
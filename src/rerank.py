@@ -1,18 +1,31 @@
 from typing import List, Dict, Any
+import numpy as np
+import torch
 from sentence_transformers import CrossEncoder
 
 
 class Reranker:
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", device: str | None = None) -> None:
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", device: str | None = None, batch_size: int = 32) -> None:
         self.model = CrossEncoder(model_name, device=device)
+        self.batch_size = batch_size
+        # FP16 weights on GPU; CPU stays in FP32
+        if next(self.model.model.parameters()).device.type == "cuda":
+            self.model.model.half()
 
     def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
-        if not candidates:
+        if not candidates or top_k <= 0:
             return []
-        pairs = [[query, c.get("content", "")] for c in candidates]
-        scores = self.model.predict(pairs)
+        # Feed pairs shortest-first so each batch pads to similar lengths, then restore candidate order
+        order = np.argsort([len(c.get("content", "")) for c in candidates], kind="stable")
+        pairs = [[query, candidates[i].get("content", "")] for i in order]
+        with torch.inference_mode():
+            sorted_scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False, convert_to_numpy=True)
+        scores = np.empty(len(candidates), dtype=np.float32)
+        scores[order] = np.asarray(sorted_scores, dtype=np.float32).reshape(-1)
         for c, s in zip(candidates, scores):
             c["rerank_score"] = float(s)
-        # Sort by rerank score desc, fallback to retriever score
-        candidates.sort(key=lambda x: (x.get("rerank_score", 0.0), x.get("score", 0.0)), reverse=True)
-        return candidates[:top_k]
+        # Select top_k in O(n), then sort only those by rerank score desc, fallback to retriever score
+        k = min(top_k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k].tolist()
+        top.sort(key=lambda i: (candidates[i]["rerank_score"], candidates[i].get("score", 0.0)), reverse=True)
+        return [candidates[i] for i in top]
@@ -1,13 +1,17 @@
 from typing import List, Dict, Any
+import numpy as np
 from .indexer import ChunkIndex
 
 
-def retrieve(index: ChunkIndex, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-    neighbors = index.query(query, top_k=top_k)
+def retrieve(index: ChunkIndex, query: str, top_k: int = 5, query_vec: np.ndarray | None = None) -> List[Dict[str, Any]]:
+    if query_vec is not None:
+        neighbors = index.query_with_vec(query_vec, top_k=top_k, text=query)
+    else:
+        neighbors = index.query(query, top_k=top_k)
     results: List[Dict[str, Any]] = []
     for idx, score in neighbors:
-        meta = index.meta[idx]
-        item = dict(meta)
+        # row() already builds a fresh dict from the index columns, so it can be annotated in place
+        item = index.row(idx)
         item["score"] = float(score)
         results.append(item)
     return results
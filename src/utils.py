@@ -3,7 +3,15 @@ import re
 import time
 import json
 import hashlib
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Hashable
+import numpy as np
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # stdlib json fallback
+from ._chunk_fast import window_bounds
 
 
 def ensure_dir(path: str) -> None:
@@ -12,12 +20,19 @@ def ensure_dir(path: str) -> None:
 
 
 def read_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def write_json(path: str, data: Any) -> None:
     ensure_dir(os.path.dirname(path) or ".")
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
@@ -30,40 +45,33 @@ def normalize_whitespace(text: str) -> str:
     return text.strip()
 
 
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z(\[])")
+
+
 def naive_sentence_split(text: str) -> List[str]:
     # Very simple sentence splitter without external deps
-    parts = re.split(r"(?<=[.!?])\s+(?=[A-Z(\[])", text)
-    sentences = [p.strip() for p in parts if p and p.strip()]
+    parts = SENTENCE_BOUNDARY_RE.split(text)
+    sentences = [s for s in (p.strip() for p in parts) if s]
     return sentences
 
 
 def sliding_window_chunks(sentences: List[str], max_chars: int = 1200, overlap_sentences: int = 1) -> List[str]:
+    if not sentences:
+        return []
+    lengths = np.fromiter((len(s) for s in sentences), dtype=np.int32, count=len(sentences))
     chunks: List[str] = []
-    start = 0
-    while start < len(sentences):
-        current: List[str] = []
-        total = 0
-        i = start
-        while i < len(sentences) and total + len(sentences[i]) + 1 <= max_chars:
-            current.append(sentences[i])
-            total += len(sentences[i]) + 1
-            i += 1
-        if not current:
+    for start, end, truncated in window_bounds(lengths, max_chars, overlap_sentences).tolist():
+        if truncated:
             # Fallback for very long single sentence
-            current = [sentences[start][:max_chars]]
-            i = start + 1
-        chunks.append(" ".join(current))
-        if i >= len(sentences):
-            break
-        start = max(i - overlap_sentences, start + 1)
+            chunks.append(sentences[start][:max_chars])
+        else:
+            chunks.append(" ".join(sentences[start:end]))
     return chunks
 
 
 def compute_id(*parts: str) -> str:
-    m = hashlib.sha256()
-    for p in parts:
-        m.update(p.encode("utf-8"))
-    return m.hexdigest()[:16]
+    # Non-cryptographic id: one 8-byte BLAKE2b call; the NUL separator keeps ("ab", "c") != ("a", "bc")
+    return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=8).hexdigest()
 
 
 class Stopwatch:
@@ -74,28 +82,85 @@ class Stopwatch:
         return (time.perf_counter() - self._t0) * 1000.0
 
 
-FIGURE_REF_RE = re.compile(r"(?:Fig(?:ure)?\s*)(\d+[a-z]?)", re.IGNORECASE)
-TABLE_REF_RE = re.compile(r"(?:Table\s*)(\d+[a-z]?)", re.IGNORECASE)
-EQUATION_REF_RE = re.compile(r"(?:Eq(?:uation)?\.?\s*)(\d+[a-z]?)", re.IGNORECASE)
+class LRUCache:
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> List[Any]:
+        # Least- to most-recently used, so re-inserting in order restores recency
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# One scan for all three reference kinds. The lookahead consumes nothing, so a reference glued to
+# the end of another ("Fig 1table 2") is still found, as with one findall pass per kind
+XREF_RE = re.compile(
+    r"(?=Fig(?:ure)?\s*(?P<figure>\d+[a-z]?)|Table\s*(?P<table>\d+[a-z]?)|Eq(?:uation)?\.?\s*(?P<equation>\d+[a-z]?))",
+    re.IGNORECASE,
+)
 
 
 def extract_cross_refs(text: str) -> Dict[str, List[str]]:
-    refs: Dict[str, List[str]] = {"figure": [], "table": [], "equation": []}
-    for kind, regex in [("figure", FIGURE_REF_RE), ("table", TABLE_REF_RE), ("equation", EQUATION_REF_RE)]:
-        matches = regex.findall(text or "")
-        if matches:
-            refs[kind] = list(dict.fromkeys(matches))
-    return refs
+    # dicts as ordered sets: dedupe while keeping first-seen order
+    seen: Dict[str, Dict[str, None]] = {"figure": {}, "table": {}, "equation": {}}
+    # Matches of one kind never overlap each other, as with findall
+    last_end = {"figure": -1, "table": -1, "equation": -1}
+    for m in XREF_RE.finditer(text or ""):
+        kind = m.lastgroup
+        if m.start() < last_end[kind]:
+            continue
+        last_end[kind] = m.end(kind)
+        seen[kind][m.group(kind)] = None
+    return {kind: list(vals) for kind, vals in seen.items()}
+
+
+def compute_files_digest_fast(file_paths: List[str]) -> str:
+    # Stat-only fingerprint: O(files), never reads PDF bytes
+    m = hashlib.blake2b(digest_size=16)
+    for p in sorted(os.path.abspath(p) for p in file_paths):
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            continue
+        m.update(f"{p}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return m.hexdigest()
 
 
-def compute_files_digest(file_paths: List[str]) -> str:
+def compute_files_digest(file_paths: List[str], block_size: int = 1 << 20) -> str:
+    # Content digest: reads every byte, so it survives copies/touches that change stat metadata
     m = hashlib.sha256()
     for p in sorted(file_paths):
         try:
-            st = os.stat(p)
-            m.update(p.encode("utf-8"))
-            m.update(str(st.st_size).encode("utf-8"))
-            m.update(str(int(st.st_mtime)).encode("utf-8"))
+            with open(p, "rb") as f:
+                for block in iter(lambda: f.read(block_size), b""):
+                    m.update(block)
         except FileNotFoundError:
             continue
     return m.hexdigest()[:16]